@@ -4,6 +4,8 @@ import numpy as np
 import plotly.express as px
 from datetime import datetime
 import os
+import csv
+import io
 import logging
 from filelock import FileLock
 
@@ -11,6 +13,17 @@ from filelock import FileLock
 DATA_FILE = "wellness_data.csv"
 SCORE_MIN, SCORE_MAX = 0, 100
 LOCK_TIMEOUT = 10  # seconds
+# Column types applied while parsing, so reloads skip a separate coercion pass;
+# columns not listed here (e.g. from older app versions) are not read at all
+COLUMN_TYPES = {
+    "username": str, "date": str, "sleep_hours": "float64", "screen_time": "float64",
+    "stress_level": "float64", "mood": str, "wellness_score": "float64",
+    "tip": str, "journal": str
+}
+NUMERIC_COLUMNS = [col for col, kind in COLUMN_TYPES.items() if kind == "float64"]
+# Above this size the data file is streamed in chunks instead of loaded whole
+LARGE_FILE_BYTES = 100 * 1024 * 1024
+CHUNK_ROWS = 50_000
 
 # ---------- Logging ----------
 logging.basicConfig(
@@ -27,11 +40,44 @@ def ensure_datafile():
         ])
         df.to_csv(DATA_FILE, index=False)
 
-@st.cache_data
-def load_data():
+def is_large_datafile():
+    return os.path.getsize(DATA_FILE) > LARGE_FILE_BYTES
+
+def data_version():
+    # Changes on every append (size) and on every rewrite (inode, mtime)
+    ensure_datafile()
+    info = os.stat(DATA_FILE)
+    return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+# Reads and cleans the data file. With row_filter the file is streamed in
+# chunks and only matching rows are kept, so memory follows the result size
+def read_data(row_filter=None):
     ensure_datafile()
+    def read(dtype):
+        # Blank tip/journal stay "", blank numbers and usernames become NaN
+        read_options = dict(
+            usecols=lambda col: col in COLUMN_TYPES,
+            dtype=dtype,
+            keep_default_na=False,
+            na_values={col: [""] for col in NUMERIC_COLUMNS + ["username"]},
+            low_memory=False
+        )
+        if row_filter is None:
+            return pd.read_csv(DATA_FILE, **read_options)
+        reader = pd.read_csv(DATA_FILE, chunksize=CHUNK_ROWS, **read_options)
+        return pd.concat([chunk[row_filter(chunk)] for chunk in reader], ignore_index=True)
+
     try:
-        df = pd.read_csv(DATA_FILE)
+        try:
+            df = read(COLUMN_TYPES)
+        except ValueError as e:
+            # A malformed numeric cell fails the typed parse; re-read as text and
+            # coerce, so only the bad cells become NaN instead of the whole table
+            logging.warning("Data file has non-numeric values, coercing: %s", e)
+            df = read(str)
+            for col in NUMERIC_COLUMNS:
+                if col in df.columns:
+                    df[col] = pd.to_numeric(df[col], errors='coerce')
     except Exception as e:
         logging.error("Failed to read data file: %s", e)
         return pd.DataFrame(columns=[
@@ -40,58 +86,102 @@ def load_data():
         ])
 
     if "date" in df.columns:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        # Normalized to midnight once here, so callers compare Timestamps directly
+        # Mixed: save_entry writes date-only rows next to older timestamped ones
+        df['date'] = pd.to_datetime(df['date'], errors='coerce', format='mixed').dt.normalize()
     else:
         df['date'] = pd.NaT
 
-    for col in ["sleep_hours", "screen_time", "stress_level", "wellness_score"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
+    # Rows logged without a score get one computed in a single vectorized pass
+    unscored = (
+        df['wellness_score'].isna() & df['sleep_hours'].notna()
+        & df['screen_time'].notna() & df['stress_level'].notna()
+    )
     df['sleep_hours'] = df['sleep_hours'].fillna(0)
     df['screen_time'] = df['screen_time'].fillna(0)
-    df['stress_level'] = df['stress_level'].fillna(0).astype(int)
-    df['wellness_score'] = df['wellness_score'].fillna(0).astype(int)
+    # Narrow dtypes: stress is 0-10 and the score 0-100, so int8 is enough
+    df['stress_level'] = df['stress_level'].fillna(0).clip(0, 10).astype(np.int8)
+    if unscored.any():
+        df.loc[unscored, 'wellness_score'] = compute_wellness_score(
+            df.loc[unscored, 'sleep_hours'].values,
+            df.loc[unscored, 'screen_time'].values,
+            df.loc[unscored, 'stress_level'].values
+        )
+    df['wellness_score'] = df['wellness_score'].fillna(0).clip(SCORE_MIN, SCORE_MAX).astype(np.int8)
     df['username'] = df.get('username', "")
+    # Few distinct values, so filters and groupbys can work on integer codes
+    df['username'] = df['username'].astype('category')
+    df['mood'] = df['mood'].astype('category')
+
+    df = df.drop_duplicates(subset=["username", "date"], keep="last")
+
+    # Index by user so per-user lookups avoid a full-column scan (see user_rows).
+    # Stable sort keeps each user's rows in file order on every read path
+    return df.set_index('username', drop=False).rename_axis(None).sort_index(kind='mergesort')
+
+# version is only part of the cache key, so any write to the data file
+# starts a fresh entry without clearing unrelated caches
+@st.cache_data(max_entries=1)
+def load_data(version):
+    return read_data()
+
+# Large-file path: one entry per user, so users sharing the server don't evict each other
+@st.cache_data(max_entries=32)
+def load_user_data(version, username):
+    return read_data(lambda chunk: chunk["username"] == username)
 
-    return df.drop_duplicates(subset=["username", "date"], keep="last")
+def load_view_data(version, username):
+    return load_user_data(version, username) if is_large_datafile() else load_data(version)
+
+def user_rows(df, username):
+    return df.loc[[username]] if username in df.index else df.iloc[:0]
+
+# One O_APPEND write per row: each row lands at the current end of file.
+# Binary mode keeps Windows from translating the row's line ending
+def append_bytes(data):
+    fd = os.open(DATA_FILE, os.O_WRONLY | os.O_APPEND | getattr(os, "O_BINARY", 0))
+    try:
+        # os.write may write less than asked; keep going until the row is out
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+    finally:
+        os.close(fd)
 
 def save_entry(entry):
-    lock = FileLock(f"{DATA_FILE}.lock", timeout=LOCK_TIMEOUT)
+    entry_date = pd.Timestamp(entry['date']).normalize()
+    key = (entry['username'], entry_date)
+    # Duplicate check against the entries this session already knows about
+    if "saved_keys" not in st.session_state:
+        df_user = user_rows(load_view_data(data_version(), entry['username']), entry['username'])
+        st.session_state.saved_keys = set(zip(df_user['username'], df_user['date']))
+    if key in st.session_state.saved_keys:
+        st.warning("You’ve already submitted an entry for this date.")
+        return False
+
     try:
-        with lock:
-            df = load_data()
-            df['date_only'] = pd.to_datetime(df['date']).dt.date
-            entry_date = pd.to_datetime(entry['date']).date()
-            exists = ((df['username'] == entry['username']) &
-                      (df['date_only'] == entry_date)).any()
-            if exists:
-                st.warning("You’ve already submitted an entry for this date.")
-                return False
-
-            entry_to_save = entry.copy()
-            entry_to_save['date'] = pd.to_datetime(entry_to_save['date']).date().isoformat()
-            df_new = pd.concat(
-                [df.drop(columns=['date_only'], errors='ignore'),
-                 pd.DataFrame([entry_to_save])],
-                ignore_index=True
-            )
-            df_new.to_csv(DATA_FILE, index=False)
-            try:
-                st.cache_data.clear()
-            except Exception:
-                pass
-            return True
+        ensure_datafile()
+        entry_to_save = entry.copy()
+        entry_to_save['date'] = entry_date.date().isoformat()
+        with open(DATA_FILE, newline='') as f:
+            header = next(csv.reader(f))
+        buf = io.StringIO()
+        csv.writer(buf).writerow([entry_to_save.get(col, "") for col in header])
+        append_bytes(buf.getvalue().encode("utf-8"))
+        st.session_state.saved_keys.add(key)
+        return True
     except Exception as e:
         logging.error("Error saving entry: %s", e)
         st.error("An error occurred while saving. Please try again.")
         return False
 
+# Works on a single check-in or on whole columns (NumPy arrays) at once
 def compute_wellness_score(sleep, screen, stress):
-    sleep_score = np.clip((sleep / 8.0) * 40, 0, 40)
-    stress_score = np.clip((10 - stress) / 10.0 * 30, 0, 30)
-    screen_score = 30 if screen <= 3 else max(0, 30 - (screen - 3) * (30 / 9))
-    return int(np.clip(sleep_score + stress_score + screen_score, SCORE_MIN, SCORE_MAX))
+    sleep_score = np.clip(sleep * 5.0, 0, 40)
+    stress_score = np.clip((10 - stress) * 3.0, 0, 30)
+    screen_score = np.where(screen <= 3, 30.0, np.maximum(0.0, 30 - (screen - 3) * (30 / 9)))
+    score = np.clip(sleep_score + stress_score + screen_score, SCORE_MIN, SCORE_MAX).astype(np.int32)
+    return int(score) if np.ndim(score) == 0 else score
 
 def generate_tip(sleep, screen, stress, mood):
     tip = ""
@@ -116,12 +206,32 @@ def render_card(title, value, delta=None, color="#4CAF50", emoji=""):
     """, unsafe_allow_html=True)
 
 def get_last_n_days(df, n=7, username=None):
-    df_user = df[df["username"]==username] if username else df
-    df_user = df_user.copy()
-    df_user["date_only"] = pd.to_datetime(df_user["date"]).dt.date
-    today = pd.Timestamp(datetime.now().date())
-    start = today - pd.Timedelta(days=n-1)
-    return df_user[df_user["date_only"] >= start.date()].sort_values("date_only").tail(n)
+    df_user = user_rows(df, username) if username else df
+    start = pd.Timestamp.now().normalize() - pd.Timedelta(days=n-1)
+    return df_user.loc[df_user["date"] >= start].sort_values("date").tail(n)
+
+def read_date_window(start, end):
+    # Large-file path: stream the file keeping rows in [start, end), with the same cleanup as load_data
+    def in_window(chunk):
+        dates = pd.to_datetime(chunk["date"], errors="coerce", format="mixed").dt.normalize()
+        return (dates >= start) & (dates < end)
+    return read_data(in_window)
+
+# Bounded because version changes on every save, leaving older entries stale
+@st.cache_data(max_entries=4)
+def leaderboard_scores(version, kind, today):
+    start = today if kind == "Daily" else today - pd.Timedelta(days=6)
+    end = today + pd.Timedelta(days=1)
+    if is_large_datafile():
+        df_period = read_date_window(start, end)
+    else:
+        data = load_data(version)
+        df_period = data[(data["date"] >= start) & (data["date"] < end)]
+    df_score = df_period.groupby("username", as_index=False, observed=True)["wellness_score"].mean()
+    df_score = df_score.sort_values("wellness_score", ascending=False).reset_index(drop=True)
+    df_score["Rank"] = df_score.index + 1
+    df_score["Medal"] = np.take(["", "🥇", "🥈", "🥉"], np.where(df_score["Rank"] <= 3, df_score["Rank"], 0))
+    return df_score
 
 # ---------- Streamlit Setup ----------
 st.set_page_config(page_title="🌿 Digital Wellness App", layout="wide")
@@ -157,7 +267,9 @@ if not st.session_state.logged_in:
 # ---------- DASHBOARD ----------
 username = st.session_state.username
 date_input = st.session_state.date_input
-data = load_data()
+data_ver = data_version()
+# Large files are only ever loaded for the logged-in user
+data = load_view_data(data_ver, username)
 
 if "dashboard_page" not in st.session_state:
     st.session_state.dashboard_page = "Today's Check-in"
@@ -173,9 +285,8 @@ st.session_state.dashboard_page = option
 
 # ---------- TODAY'S CHECK-IN ----------
 if option == "Today's Check-in":
-    df_user = data[data["username"] == username].copy()
-    df_user['date_only'] = pd.to_datetime(df_user['date']).dt.date
-    today_entry = df_user[df_user['date_only'] == pd.to_datetime(date_input).date()]
+    df_user = user_rows(data, username)
+    today_entry = df_user[df_user['date'] == pd.Timestamp(date_input)]
 
     c1, c2 = st.columns([1,3])
     with c1:
@@ -214,7 +325,6 @@ if option == "Today's Check-in":
                     st.session_state[checkin_key] = True
                     st.success("✅ Today's check-in saved!")
                     st.balloons()
-                    data = load_data()
                     st.rerun()
         else:
             st.info("✅ You have already submitted today's check-in.")
@@ -264,61 +374,57 @@ elif option == "Leaderboard":
     st.header("🏆 Leaderboard")
     df_score_type = st.selectbox("Select leaderboard type:", ["Daily", "Weekly"])
     today = pd.Timestamp(datetime.now().date())
-
-    if df_score_type == "Daily":
-        df_today = data[data["date"].dt.date == today.date()]
-        df_score = df_today.groupby("username", as_index=False)["wellness_score"].mean()
-    else:
-        week_ago = today - pd.Timedelta(days=6)
-        df_week = data[(data["date"].dt.date >= week_ago.date()) & (data["date"].dt.date <= today.date())]
-        df_score = df_week.groupby("username", as_index=False)["wellness_score"].mean()
+    df_score = leaderboard_scores(data_ver, df_score_type, today)
 
     if df_score.empty:
         st.info("No leaderboard records yet.")
     else:
-        df_score = df_score.sort_values("wellness_score", ascending=False).reset_index(drop=True)
-        df_score["Rank"] = df_score.index + 1
-        df_score["Medal"] = df_score["Rank"].apply(lambda r: ["🥇","🥈","🥉"][r-1] if r <= 3 else "")
-        for _, row in df_score.iterrows():
+        # One markdown call for the whole board instead of one per row
+        html_parts = []
+        for row in df_score.itertuples(index=False):
             bg_color = "#1a1a1a"
-            rank_color = "gold" if row["Rank"] == 1 else ("silver" if row["Rank"] == 2 else ("#cd7f32" if row["Rank"] == 3 else "white"))
-            st.markdown(f"""
+            rank_color = "gold" if row.Rank == 1 else ("silver" if row.Rank == 2 else ("#cd7f32" if row.Rank == 3 else "white"))
+            html_parts.append(f"""
             <div style='background-color:{bg_color}; padding:12px; border-radius:10px; margin-bottom:5px;'>
-                <h4 style='color:{rank_color}; margin:0;'>Rank {row['Rank']} {row['Medal']}</h4>
-                <p style='color:white; margin:2px 0;'>User: {row['username']} | Score: {row['wellness_score']:.1f}</p>
+                <h4 style='color:{rank_color}; margin:0;'>Rank {row.Rank} {row.Medal}</h4>
+                <p style='color:white; margin:2px 0;'>User: {row.username} | Score: {row.wellness_score:.1f}</p>
             </div>
-            """, unsafe_allow_html=True)
+            """)
+        st.markdown("".join(html_parts), unsafe_allow_html=True)
 
 # ---------- VIEW PAST ENTRIES ----------
 elif option == "View Past Entries":
     st.header("📜 Past Entries")
-    df_user = data[data["username"] == username].sort_values("date", ascending=False)
+    df_user = user_rows(data, username).sort_values("date", ascending=False)
     if df_user.empty:
         st.info("No past entries found.")
     else:
-        for i, row in enumerate(df_user.itertuples(), start=1):
-            date_str = pd.to_datetime(row.date).strftime("%B %d, %Y") if pd.notnull(row.date) else "Date Missing"
-            st.markdown(f"""
+        date_strs = df_user["date"].dt.strftime("%B %d, %Y").fillna("Date Missing").tolist()
+        html_parts = []
+        for i, (row, date_str) in enumerate(zip(df_user.itertuples(index=False), date_strs), start=1):
+            html_parts.append(f"""
             <div style='background-color:#1a1a1a; padding:10px; border-radius:10px; margin-bottom:5px;'>
                 <h4 style='color:red; margin:0;'>{i}. {date_str}</h4>
                 <p style='color:white; margin:2px 0;'>Sleep: {row.sleep_hours} | Screen: {row.screen_time} | Stress: {row.stress_level} | Score: {row.wellness_score}</p>
                 <p style='color:white; margin:2px 0;'>Mood: {row.mood}</p>
                 <p style='color:white; margin:2px 0;'>Journal: {row.journal}</p>
             </div>
-            """, unsafe_allow_html=True)
+            """)
+        st.markdown("".join(html_parts), unsafe_allow_html=True)
 
 # ---------- CLEAR / SWITCH / EXIT ----------
 elif option == "Clear All Past Entries":
     if st.button("⚠ Delete All Data"):
-        ensure_datafile()
-        pd.DataFrame(columns=[
-            "username","date","sleep_hours","screen_time","stress_level",
-            "mood","wellness_score","tip","journal"
-        ]).to_csv(DATA_FILE, index=False)
-        try:
-            st.cache_data.clear()
-        except Exception:
-            pass
+        # Truncating is the one path that still needs the lock; the empty file
+        # is swapped in atomically so concurrent appends never land before the header
+        with FileLock(f"{DATA_FILE}.lock", timeout=LOCK_TIMEOUT):
+            tmp_file = f"{DATA_FILE}.tmp"
+            pd.DataFrame(columns=[
+                "username","date","sleep_hours","screen_time","stress_level",
+                "mood","wellness_score","tip","journal"
+            ]).to_csv(tmp_file, index=False)
+            os.replace(tmp_file, DATA_FILE)
+        st.session_state.pop("saved_keys", None)
         st.success("✅ All entries deleted!")
         st.stop()
 